@@ -3,7 +3,6 @@
 Complete setup and demo script for the Pydantic AI RAG Agent
 """
 import asyncio
-import os
 import sys
 from pathlib import Path
 
@@ -11,8 +10,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.agent import rag_agent
+from src.database import vector_store
 from src.database.models import PluginQuery, PluginChain, Plugin
-from src.api.server import main as start_server
+from src.utils import get_config
 
 
 async def setup_demo():
@@ -21,14 +21,15 @@ async def setup_demo():
     print("🎵 Pydantic AI RAG Agent for Audio Plugin Recommendations")
     print("=" * 60)
     
-    # Check environment
-    if not os.getenv("OPENAI_API_KEY"):
+    # Check environment; get_config() also loads .env
+    config = get_config()
+    if not config.openai_api_key:
         print("⚠️  Warning: OPENAI_API_KEY not set. Please set it in .env file")
         print("   Copy .env.example to .env and add your OpenAI API key")
         return
     
-    if not os.getenv("DATABASE_URL"):
-        print("⚠️  Warning: DATABASE_URL not set. Please set it in .env file")
+    if not (config.database.url or config.database.host):
+        print("⚠️  Warning: DATABASE_URL (or DB_HOST) not set. Please set it in .env file")
         print("   Make sure PostgreSQL with pgvector is running")
         return
     
@@ -104,12 +105,16 @@ async def add_sample_data():
         )
     ]
     
-    for chain in sample_chains:
-        try:
-            chain_id = await rag_agent.add_plugin_chain(chain)
-            print(f"✅ Added: {chain.name} (ID: {chain_id})")
-        except Exception as e:
-            print(f"⚠️  Chain '{chain.name}' may already exist: {e}")
+    results = await asyncio.gather(
+        *[rag_agent.add_plugin_chain(chain) for chain in sample_chains],
+        return_exceptions=True
+    )
+    
+    for chain, result in zip(sample_chains, results):
+        if isinstance(result, Exception):
+            print(f"⚠️  Chain '{chain.name}' may already exist: {result}")
+        else:
+            print(f"✅ Added: {chain.name} (ID: {result})")
 
 
 async def run_examples():
@@ -130,23 +135,37 @@ async def run_examples():
         }
     ]
     
-    for i, example in enumerate(examples, 1):
+    # Queries are independent, so run them concurrently
+    responses = await asyncio.gather(
+        *[rag_agent.run_sync(example['query']) for example in examples],
+        return_exceptions=True
+    )
+    
+    for i, (example, response) in enumerate(zip(examples, responses), 1):
         print(f"\n--- Example {i}: {example['description']} ---")
         print(f"Query: {example['query']}")
         
-        try:
-            response = await rag_agent.run_sync(example['query'])
-            
-            print(f"Found {len(response.recommendations)} recommendations")
-            print(f"Confidence: {response.confidence:.2f}")
-            print(f"Explanation: {response.explanation[:100]}...")
-            
-            if response.recommendations:
-                top_rec = response.recommendations[0]
-                print(f"Top recommendation: {getattr(top_rec, 'name', 'N/A')}")
-            
-        except Exception as e:
-            print(f"❌ Query failed: {e}")
+        if isinstance(response, Exception):
+            print(f"❌ Query failed: {response}")
+            continue
+        
+        print(f"Found {len(response.recommendations)} recommendations")
+        print(f"Confidence: {response.confidence:.2f}")
+        print(f"Explanation: {response.explanation[:100]}...")
+        
+        if response.recommendations:
+            top_rec = response.recommendations[0]
+            print(f"Top recommendation: {getattr(top_rec, 'name', 'N/A')}")
+
+
+async def build_indexes():
+    """Create or rebuild the vector indices"""
+    print("Building vector indices (this can take a while on large tables)...")
+    try:
+        await vector_store.build_indexes()
+        print("✅ Indices are up to date")
+    finally:
+        await vector_store.db.close_pool()
 
 
 def main():
@@ -156,19 +175,31 @@ def main():
     parser = argparse.ArgumentParser(description="Pydantic AI RAG Agent Demo")
     parser.add_argument("--server", action="store_true", help="Start the API server")
     parser.add_argument("--demo", action="store_true", help="Run the demo setup")
+    parser.add_argument("--build-indexes", action="store_true", help="Create or rebuild the vector indices")
     
     args = parser.parse_args()
     
     if args.server:
+        # Imported here so the demo does not load FastAPI and uvicorn
+        from src.api.server import main as start_server
+        
         print("Starting API server...")
         start_server()
     elif args.demo:
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass  # uvloop is unavailable on Windows
         asyncio.run(setup_demo())
+    elif args.build_indexes:
+        asyncio.run(build_indexes())
     else:
         print("Pydantic AI RAG Agent")
         print("Usage:")
         print("  python demo.py --demo    # Run demo setup")
         print("  python demo.py --server  # Start API server")
+        print("  python demo.py --build-indexes  # Create or rebuild vector indices")
 
 
 if __name__ == "__main__":
@@ -119,8 +119,10 @@ async def add_sample_chains():
     
     # Add chains to database
     try:
-        await rag_agent.add_plugin_chain(vintage_vocal)
-        await rag_agent.add_plugin_chain(drum_bus)
+        await asyncio.gather(
+            rag_agent.add_plugin_chain(vintage_vocal),
+            rag_agent.add_plugin_chain(drum_bus)
+        )
         print("Sample plugin chains added successfully!")
     except Exception as e:
         print(f"Note: Sample chains may already exist: {e}")
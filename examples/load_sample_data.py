@@ -31,8 +31,7 @@ async def load_plugin_chains():
         )
     ]
     
-    for chain in chains:
-        await vector_store.add_plugin_chain(chain)
+    await vector_store.bulk_insert_chains(chains)
     
     print(f"Loaded {len(chains)} plugin chains")
 
@@ -55,8 +54,7 @@ async def load_knowledge_base():
         )
     ]
     
-    for chunk in chunks:
-        await vector_store.add_document_chunk(chunk)
+    await vector_store.add_document_chunks_bulk(chunks)
     
     print(f"Loaded {len(chunks)} knowledge base chunks")
 
@@ -3,8 +3,7 @@ Main package initialization
 """
 from .agent import AudioPluginRAGAgent, rag_agent
 from .database import db, vector_store, PluginQuery, PluginChain, RAGResponse
-from .utils import config
-from .api import app
+from .utils import get_config
 
 __all__ = [
     "AudioPluginRAGAgent",
@@ -15,5 +14,16 @@ __all__ = [
     "PluginChain", 
     "RAGResponse",
     "config",
+    "get_config",
     "app"
 ]
+
+
+def __getattr__(name):
+    """Import the FastAPI app lazily so CLI use does not load the web stack"""
+    if name == "app":
+        from .api import app
+        return app
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,16 +2,56 @@
 Main Pydantic AI RAG Agent for Audio Plugin Recommendations
 """
 import time
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
+import httpx
 from pydantic_ai import Agent, RunContext
+from pydantic_ai.models import Model
+from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic import BaseModel, Field
 
 from ..database.models import PluginQuery, RAGResponse, PluginRecommendation, PluginChain
 from ..database.vector_store import vector_store
-from ..utils.config import config
+from ..utils.config import get_config
+from ..utils.embedding_cache import embed_query
+from ..utils.http_client import http_client as shared_http_client
+from ..utils.semantic_cache import SemanticCache
 from .tools import RAGDependencies, search_plugin_chains_tool, search_knowledge_base_tool
 
 
+# Top-1 retrieval similarity at which the LLM is skipped entirely
+FAST_PATH_THRESHOLD = 0.9
+
+# Kept as a module constant so every agent sends a byte-identical prompt
+_SYSTEM_PROMPT = """
+        You are an expert audio engineer and plugin specialist with deep knowledge of music production.
+        Your role is to recommend optimal plugin chains for specific audio engineering tasks.
+        
+        Use the search_plugin_chains_tool to find relevant plugin chains from the database.
+        Use the search_knowledge_base_tool to find additional audio engineering information.
+        
+        When making recommendations:
+        1. Consider the musical genre and target instrument
+        2. Explain the signal flow and why each plugin works in the chain
+        3. Provide specific settings recommendations when available
+        4. Consider the user's owned plugins if provided
+        5. Explain the sonic characteristics each plugin contributes
+        6. Suggest alternatives if the exact plugins aren't available
+        
+        Be practical, educational, and focus on achieving professional results.
+        Always explain your reasoning and provide confidence in your recommendations.
+        """
+
+# Static worked example sent after the system prompt and before the user query,
+# so the cacheable request prefix never depends on the query
+_FEW_SHOT = """
+        Example request: "I need a punchy drum bus chain for rock"
+        Example approach: call search_plugin_chains with genre "rock" and instrument "drums",
+        recommend the closest matching chain, explain how the bus compressor glues the kit
+        before the EQ shapes it, and suggest alternatives for plugins the user does not own.
+        """
+
+
 class AudioPluginResponse(BaseModel):
     """Structured response from the audio plugin RAG agent"""
     recommendations: List[dict] = Field(description="List of recommended plugin chains")
@@ -26,42 +66,56 @@ class AudioPluginRAGAgent:
     using RAG from PostgreSQL vector database
     """
     
-    def __init__(self, model: str = "openai:gpt-4o"):
-        # Initialize the agent with dependencies and output type
+    def __init__(
+        self,
+        model: str = "openai:gpt-4o",
+        cache_threshold: float = 0.95,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = 300.0,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        # Initialize the agent with dependencies and output type. The model
+        # (and the API key from the config) is only resolved on the first run
         self.agent = Agent[RAGDependencies, AudioPluginResponse](
             model=model,
             deps_type=RAGDependencies,
             output_type=AudioPluginResponse,
-            system_prompt=self._get_system_prompt(),
-            instrument=True  # Enable Logfire instrumentation
+            system_prompt=(self._get_system_prompt(), _FEW_SHOT),
+            instrument=True,  # Enable Logfire instrumentation
+            defer_model_check=True
         )
+        self._model_name = model
+        self._http_client = http_client
+        self._model: Optional[Union[str, Model]] = None
         
         # Register tools
         self._register_tools()
         
-        # Initialize dependencies
-        self.dependencies = RAGDependencies()
+        # Cache of agent responses keyed on query embedding similarity
+        self.response_cache = SemanticCache(threshold=cache_threshold, max_entries=cache_size, ttl=cache_ttl)
+    
+    @staticmethod
+    def _build_model(model: str, http_client: Optional[httpx.AsyncClient]) -> Union[str, Model]:
+        """Bind OpenAI models to the given HTTP client so connections are pooled"""
+        provider, _, model_name = model.partition(":")
+        if http_client is None or provider != "openai":
+            return model
+        
+        return OpenAIModel(
+            model_name,
+            provider=OpenAIProvider(api_key=get_config().openai_api_key or None, http_client=http_client)
+        )
+    
+    @property
+    def model(self) -> Union[str, Model]:
+        """Model used for agent runs, built on first use"""
+        if self._model is None:
+            self._model = self._build_model(self._model_name, self._http_client)
+        return self._model
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for the agent"""
-        return """
-        You are an expert audio engineer and plugin specialist with deep knowledge of music production.
-        Your role is to recommend optimal plugin chains for specific audio engineering tasks.
-        
-        Use the search_plugin_chains_tool to find relevant plugin chains from the database.
-        Use the search_knowledge_base_tool to find additional audio engineering information.
-        
-        When making recommendations:
-        1. Consider the musical genre and target instrument
-        2. Explain the signal flow and why each plugin works in the chain
-        3. Provide specific settings recommendations when available
-        4. Consider the user's owned plugins if provided
-        5. Explain the sonic characteristics each plugin contributes
-        6. Suggest alternatives if the exact plugins aren't available
-        
-        Be practical, educational, and focus on achieving professional results.
-        Always explain your reasoning and provide confidence in your recommendations.
-        """
+        return _SYSTEM_PROMPT
     
     def _register_tools(self):
         """Register tools with the agent"""
@@ -72,10 +126,15 @@ class AudioPluginRAGAgent:
             query: str,
             genre: Optional[str] = None,
             instrument: Optional[str] = None,
-            max_results: int = 5
+            max_results: int = 5,
+            offset: int = 0
         ) -> List[dict]:
-            """Search for audio plugin chains based on the query."""
-            return await search_plugin_chains_tool(ctx, query, genre, instrument, max_results)
+            """
+            Search for audio plugin chains based on the query.
+            
+            Returns at most 10 chains per call; use offset to page through more.
+            """
+            return await search_plugin_chains_tool(ctx, query, genre, instrument, max_results, offset)
         
         @self.agent.tool  
         async def search_knowledge_base(
@@ -86,6 +145,90 @@ class AudioPluginRAGAgent:
             """Search the general knowledge base for audio engineering information."""
             return await search_knowledge_base_tool(ctx, query, max_results)
     
+    async def _fast_path(
+        self,
+        query: PluginQuery,
+        deps: RAGDependencies
+    ) -> Optional[AudioPluginResponse]:
+        """
+        Answer from retrieval alone when the top plugin chain is an unambiguous match
+        
+        Returns:
+            Templated response, or None if the agent should run
+        """
+        results = await vector_store.search_plugin_chains(
+            query_text=query.text,
+            limit=1,
+            genre_filter=query.genre,
+            instrument_filter=query.instrument,
+            query_embedding=await deps.get_embedding(query.text)
+        )
+        if not results:
+            return None
+        
+        chain, similarity = results[0]
+        if similarity < FAST_PATH_THRESHOLD:
+            return None
+        
+        deps.last_chains[chain.name] = chain
+        return AudioPluginResponse(
+            recommendations=[{**chain.model_dump(), "similarity_score": similarity}],
+            explanation=f"Matched on: {chain.name} — {chain.description}",
+            additional_tips=None,
+            confidence=min(similarity, 1.0)
+        )
+    
+    @staticmethod
+    def _response_scope(query: PluginQuery) -> tuple:
+        """Cache scope for a query, so responses are only reused under the same filters"""
+        return (
+            query.genre.lower() if query.genre else None,
+            query.instrument.lower() if query.instrument else None,
+            tuple(query.owned_plugins)
+        )
+    
+    async def _run_agent(
+        self,
+        query: PluginQuery,
+        deps: RAGDependencies
+    ) -> Tuple[AudioPluginResponse, bool]:
+        """
+        Run the agent, reusing the response of a semantically equivalent query
+        and skipping the LLM when retrieval alone is conclusive
+        
+        Args:
+            query: PluginQuery containing the user's request
+            deps: Dependencies for this run only
+            
+        Returns:
+            Tuple of the agent response and whether it was served from cache
+        """
+        scope = self._response_scope(query)
+        cached = self.response_cache.get_exact(query.text, scope)
+        if cached is not None:
+            return cached, True
+        
+        query_embedding = await embed_query(query.text)
+        deps.cache_embedding(query.text, query_embedding)
+        
+        cached = self.response_cache.get(query_embedding, scope)
+        if cached is not None:
+            return cached, True
+        
+        fast_response = await self._fast_path(query, deps)
+        if fast_response is not None:
+            self.response_cache.put(query_embedding, fast_response, text=query.text, scope=scope)
+            return fast_response, False
+        
+        result = await self.agent.run(
+            query.text,
+            deps=deps,
+            model=self.model
+        )
+        
+        self.response_cache.put(query_embedding, result.output, text=query.text, scope=scope)
+        return result.output, False
+    
     async def query(self, query: PluginQuery) -> RAGResponse:
         """
         Query the agent for plugin chain recommendations
@@ -98,35 +241,38 @@ class AudioPluginRAGAgent:
         """
         start_time = time.time()
         
-        # Ensure database tables are initialized
-        await vector_store.initialize_tables()
-        
         # Create query context
-        query_context = f"Query: {query.text}"
+        context_parts = [f"Query: {query.text}"]
         if query.genre:
-            query_context += f" | Genre: {query.genre}"
+            context_parts.append(f"Genre: {query.genre}")
         if query.instrument:
-            query_context += f" | Instrument: {query.instrument}"
+            context_parts.append(f"Instrument: {query.instrument}")
         if query.owned_plugins:
-            query_context += f" | Owned plugins: {', '.join(query.owned_plugins)}"
+            owned_plugins = ", ".join(query.owned_plugins)
+            context_parts.append(f"Owned plugins: {owned_plugins}")
         
         # Run the agent
-        result = await self.agent.run(
-            query.text,
-            deps=self.dependencies
-        )
+        deps = RAGDependencies()
+        output, cache_hit = await self._run_agent(query, deps)
+        context_parts.append(f"Cache: {'hit' if cache_hit else 'miss'}")
+        query_context = " | ".join(context_parts)
         
         # Calculate search time
         search_time = (time.time() - start_time) * 1000
         
         # Convert agent response to RAGResponse format
         recommendations = []
-        for rec in result.output.recommendations:
+        for rec in output.recommendations:
+            # Reuse chains already validated by the search tool during this run
+            chain = deps.last_chains.get(rec.get('name'))
+            if chain is None:
+                chain = PluginChain(**rec)
+            
             plugin_rec = PluginRecommendation(
-                chain=PluginChain(**rec),
+                chain=chain,
                 similarity_score=rec.get('similarity_score', 0.0),
-                explanation=result.output.explanation,
-                confidence=result.output.confidence
+                explanation=output.explanation,
+                confidence=output.confidence
             )
             recommendations.append(plugin_rec)
         
@@ -150,20 +296,16 @@ class AudioPluginRAGAgent:
         """
         query = PluginQuery(text=query_text, **kwargs)
         
-        # Ensure database tables are initialized
-        await vector_store.initialize_tables()
-        
-        result = await self.agent.run(
-            query.text,
-            deps=self.dependencies
-        )
-        
-        return result.output
+        output, _ = await self._run_agent(query, RAGDependencies())
+        return output
     
     async def add_plugin_chain(self, chain: PluginChain) -> int:
         """Add a new plugin chain to the database"""
-        await vector_store.initialize_tables()
-        return await vector_store.add_plugin_chain(chain)
+        chain_id = await vector_store.add_plugin_chain(chain)
+        
+        # Cached recommendations may no longer reflect the database
+        self.response_cache.clear()
+        return chain_id
     
     async def initialize_database(self):
         """Initialize database tables"""
@@ -171,4 +313,4 @@ class AudioPluginRAGAgent:
 
 
 # Global agent instance
-rag_agent = AudioPluginRAGAgent()
+rag_agent = AudioPluginRAGAgent(http_client=shared_http_client)
@@ -1,10 +1,18 @@
 """
 RAG tools for the Pydantic AI agent
 """
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Dict
+import numpy as np
 from pydantic_ai import RunContext
 from ..database.models import PluginQuery, PluginChain, PluginRecommendation, DocumentChunk
 from ..database.vector_store import vector_store
+from ..utils.embedding_cache import embed_query
+
+# Plugin fields passed to the LLM
+_PLUGIN_FIELDS = {"name", "manufacturer", "category", "order", "settings"}
+
+# Largest page of plugin chains returned by a single tool call
+MAX_TOOL_RESULTS = 10
 
 
 class RAGDependencies:
@@ -12,6 +20,24 @@ class RAGDependencies:
     
     def __init__(self):
         self.vector_store = vector_store
+        
+        # Validated chains returned by search tools during this run, keyed by name
+        self.last_chains: Dict[str, PluginChain] = {}
+        
+        # Query embeddings computed during this run, keyed by query text
+        self._embedding_cache: Dict[str, np.ndarray] = {}
+    
+    def cache_embedding(self, text: str, embedding: np.ndarray):
+        """Record an embedding already computed for this run"""
+        self._embedding_cache[text] = embedding
+    
+    async def get_embedding(self, text: str) -> np.ndarray:
+        """Embed a query once per run, however many tools search with it"""
+        embedding = self._embedding_cache.get(text)
+        if embedding is None:
+            embedding = await embed_query(text)
+            self._embedding_cache[text] = embedding
+        return embedding
 
 
 async def search_plugin_chains_tool(
@@ -19,51 +45,49 @@ async def search_plugin_chains_tool(
     query: str,
     genre: Optional[str] = None,
     instrument: Optional[str] = None,
-    max_results: int = 5
+    max_results: int = 5,
+    offset: int = 0
 ) -> List[dict]:
     """
     Search for audio plugin chains based on the query.
     
+    Results are returned in pages of at most MAX_TOOL_RESULTS chains so each
+    tool return stays small; call again with a higher offset for more.
+    
     Args:
         query: Natural language description of desired sound/chain
         genre: Musical genre filter (optional)
         instrument: Target instrument filter (optional)
-        max_results: Maximum number of results to return
+        max_results: Maximum number of results to return (1 to MAX_TOOL_RESULTS)
+        offset: Number of top-ranked results to skip (negative values count as 0)
     
     Returns:
         List of plugin chains with similarity scores
     """
     results = await ctx.deps.vector_store.search_plugin_chains(
         query_text=query,
-        limit=max_results,
+        limit=max(1, min(max_results, MAX_TOOL_RESULTS)),
         genre_filter=genre,
-        instrument_filter=instrument
+        instrument_filter=instrument,
+        offset=max(offset, 0),
+        query_embedding=await ctx.deps.get_embedding(query)
     )
+    ctx.deps.last_chains.update({chain.name: chain for chain, _ in results})
     
     # Convert to dict format for the LLM
-    formatted_results = []
-    for chain, similarity in results:
-        formatted_results.append({
+    return [
+        {
             "name": chain.name,
             "description": chain.description,
-            "plugins": [
-                {
-                    "name": plugin.name,
-                    "manufacturer": plugin.manufacturer,
-                    "category": plugin.category,
-                    "order": plugin.order,
-                    "settings": plugin.settings
-                }
-                for plugin in chain.plugins
-            ],
+            "plugins": [plugin.model_dump(include=_PLUGIN_FIELDS) for plugin in chain.plugins],
             "genre": chain.genre,
             "instrument": chain.instrument,
             "tags": chain.tags,
             "rating": chain.rating,
             "similarity_score": similarity
-        })
-    
-    return formatted_results
+        }
+        for chain, similarity in results
+    ]
 
 
 async def search_knowledge_base_tool(
@@ -83,7 +107,8 @@ async def search_knowledge_base_tool(
     """
     results = await ctx.deps.vector_store.search_documents(
         query_text=query,
-        limit=max_results
+        limit=max_results,
+        query_embedding=await ctx.deps.get_embedding(query)
     )
     
     # Convert to dict format for the LLM
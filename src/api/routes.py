@@ -76,7 +76,7 @@ async def health_check():
     """
     try:
         # Test database connection
-        await vector_store.initialize_tables()
+        await vector_store.db.execute_one("SELECT 1")
         return {
             "status": "healthy",
             "timestamp": time.time(),
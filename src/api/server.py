@@ -3,12 +3,14 @@ FastAPI server for the RAG agent
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import sys
 import uvicorn
 
 from .routes import router
 from ..database.vector_store import vector_store
-from ..utils.config import config
+from ..utils.http_client import http_client
 
 
 @asynccontextmanager
@@ -16,7 +18,9 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     print("Starting up RAG Agent API...")
+    app.state.http_client = http_client
     try:
+        await vector_store.db.create_pool(min_size=4, max_size=20)
         await vector_store.initialize_tables()
         print("Database initialized successfully")
     except Exception as e:
@@ -31,6 +35,8 @@ async def lifespan(app: FastAPI):
         print("Database connections closed")
     except Exception as e:
         print(f"Error closing database connections: {e}")
+    
+    await http_client.aclose()
 
 
 def create_app() -> FastAPI:
@@ -39,7 +45,8 @@ def create_app() -> FastAPI:
         title="Audio Plugin RAG Agent API",
         description="Pydantic AI agent for audio plugin chain recommendations using RAG",
         version="1.0.0",
-        lifespan=lifespan
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse
     )
     
     # Add CORS middleware
@@ -75,7 +82,9 @@ def main():
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     )
 
 
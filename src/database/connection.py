@@ -1,47 +1,113 @@
 """
 AsyncPG database connection management
 """
+import asyncio
 import asyncpg
 from typing import Optional, Any, List, Dict
 from contextlib import asynccontextmanager
-import json
-from ..utils.config import config
+import orjson
+from pgvector.asyncpg import register_vector
+from ..utils.config import get_config
 
 
 class DatabaseConnection:
     """Manages PostgreSQL connections with pgvector support"""
     
     def __init__(self, connection_url: Optional[str] = None):
-        self.connection_url = connection_url or config.database.connection_url
+        self._connection_url = connection_url
         self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+        
+        # Schema holding the pgvector types (Supabase installs it in "extensions")
+        self._vector_schema = 'public'
+        
+        # Session settings sent in the startup packet of every pooled
+        # connection rather than as a SET per connection; JIT only adds
+        # planning time to short HNSW queries
+        self.server_settings: Dict[str, str] = {
+            'jit': 'off',
+            'hnsw.ef_search': '100',
+            'application_name': 'rag-agent'
+        }
     
-    async def create_pool(self, min_size: int = 5, max_size: int = 20) -> asyncpg.Pool:
-        """Create connection pool"""
-        self._pool = await asyncpg.create_pool(
-            self.connection_url,
-            min_size=min_size,
-            max_size=max_size,
-            init=self._init_connection
-        )
+    @property
+    def connection_url(self) -> str:
+        """Connection URL, resolved from the config on first use"""
+        if self._connection_url is None:
+            self._connection_url = get_config().database.connection_url
+        return self._connection_url
+    
+    async def migrate(self):
+        """
+        One-time schema setup that must precede the pool
+        
+        Pooled connections register the pgvector codecs on init, which needs
+        the extension to exist and its schema to be known, so this runs on a
+        standalone connection.
+        """
+        connection = await asyncpg.connect(self.connection_url)
+        try:
+            await connection.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            self._vector_schema = await connection.fetchval("""
+                SELECT n.nspname
+                FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace
+                WHERE e.extname = 'vector'
+            """)
+        finally:
+            await connection.close()
+    
+    async def create_pool(self, min_size: int = 4, max_size: int = 20) -> asyncpg.Pool:
+        """Run migrations and create connection pool, reusing it if one already exists"""
+        async with self._pool_lock:
+            if self._pool is None:
+                await self.migrate()
+                self._pool = await asyncpg.create_pool(
+                    self.connection_url,
+                    min_size=min_size,
+                    max_size=max_size,
+                    max_inactive_connection_lifetime=300,
+                    init=self._init_connection,
+                    **self._connect_kwargs()
+                )
         return self._pool
     
+    def _connect_kwargs(self) -> Dict[str, Any]:
+        """Per-connection arguments for the pool"""
+        return {
+            'statement_cache_size': 1024,
+            'server_settings': dict(self.server_settings)
+        }
+    
+    async def configure_session(self, settings: Dict[str, str]):
+        """
+        Change session settings for every pooled connection
+        
+        Open connections are expired so none keeps the old values.
+        """
+        self.server_settings.update(settings)
+        if self._pool is not None:
+            self._pool.set_connect_args(self.connection_url, **self._connect_kwargs())
+            await self._pool.expire_connections()
+    
     async def _init_connection(self, connection: asyncpg.Connection):
         """Initialize connection with pgvector support"""
-        # Register vector type for pgvector
-        await connection.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+        # Binary codecs for vector/halfvec/sparsevec, required by COPY
+        await register_vector(connection, schema=self._vector_schema)
         
-        # Register custom types if needed
+        # jsonb uses the binary format (version byte + JSON text) so COPY can encode it
         await connection.set_type_codec(
-            'json',
-            encoder=json.dumps,
-            decoder=json.loads,
-            schema='pg_catalog'
+            'jsonb',
+            encoder=lambda value: b'\x01' + orjson.dumps(value),
+            decoder=lambda data: orjson.loads(data[1:]),
+            schema='pg_catalog',
+            format='binary'
         )
     
     async def close_pool(self):
         """Close connection pool"""
         if self._pool:
             await self._pool.close()
+            self._pool = None
     
     @asynccontextmanager
     async def get_connection(self):
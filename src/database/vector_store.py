@@ -1,12 +1,140 @@
 """
 Vector store operations using pgvector with existing Supabase tables
 """
+import asyncio
+import hashlib
+import json
 import asyncpg
-from typing import List, Optional, Tuple, Dict, Any
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import List, Optional, Tuple, Dict, Any, NamedTuple
 import numpy as np
 from .connection import db
 from .models import DocumentChunk, PluginChain, PluginRecommendation, Plugin
-from ..utils.embeddings import embedding_service
+from ..utils.embeddings import EmbeddingService, get_embedding_service
+from ..utils.embedding_cache import embed_cached, embed_many_cached, embed_query
+from ..utils.semantic_cache import SemanticCache
+
+
+# Candidates fetched from the binary-quantized index before exact re-ranking
+RERANK_CANDIDATES = 1000
+
+# Number of most common genres that get their own partial HNSW index
+PARTIAL_INDEX_GENRES = 10
+
+# Name prefix of the per-genre partial HNSW indexes
+GENRE_INDEX_PREFIX = "plugin_chains_bits_genre_"
+
+# Advisory lock key (hashed) serializing schema changes across workers
+SCHEMA_LOCK = "audio_plugin_rag_schema"
+
+# Upper bound on tuples visited by a filtered iterative HNSW scan
+MAX_SCAN_TUPLES = 20000
+
+# First pgvector release with iterative HNSW index scans
+ITERATIVE_SCAN_VERSION = (0, 8)
+
+# Rows per multi-row INSERT, keeping bind parameters under the protocol limit
+INSERT_BATCH_ROWS = 1000
+
+# Columns written for each plugin chain, in the order of _chain_record
+CHAIN_COLUMNS = [
+    "name", "description", "plugins", "genre", "instrument",
+    "tags", "rating", "created_by", "embedding", "content_hash"
+]
+
+
+# Expression indexed on the shared documents table to find already stored content
+DOCUMENT_HASH = "sha256(convert_to(content, 'UTF8'))"
+
+
+def _content_hash(text: str) -> bytes:
+    """SHA-256 of text, matching DOCUMENT_HASH in SQL"""
+    return hashlib.sha256(text.encode()).digest()
+
+
+@lru_cache(maxsize=None)
+def _document_search_sql(include_embedding: bool) -> str:
+    """
+    SQL for search_documents
+    
+    The text is built once per shape so every call sends an identical
+    statement, which asyncpg serves from its per-connection prepared
+    statement cache instead of re-parsing it.
+    """
+    embedding_column = "d.embedding," if include_embedding else ""
+    # Metadata is joined only for the top-k rows, not during the index scan
+    return f"""
+        WITH top AS (
+            SELECT d.id, d.content, d.metadata, {embedding_column}
+                   d.embedding::halfvec(1536) <=> $1::halfvec(1536) as distance
+            FROM documents d
+            WHERE d.embedding IS NOT NULL
+            ORDER BY distance
+            LIMIT $2
+        )
+        SELECT top.*, dm.title, dm.url,
+               1 - top.distance as similarity
+        FROM top
+        LEFT JOIN document_metadata dm ON top.metadata->>'source' = dm.id
+        ORDER BY top.distance
+    """
+
+
+@lru_cache(maxsize=None)
+def _plugin_chain_search_sql(genre: bool, instrument: bool) -> str:
+    """
+    SQL for search_plugin_chains, one prepared statement per filter shape
+    
+    Filters are equality matches on the lowercased genre_norm/instrument_norm
+    columns, applied inside the candidate scan, with values bound from $4
+    onwards (genre first).
+    """
+    conditions = []
+    param_count = 3
+    
+    if genre:
+        param_count += 1
+        conditions.append(f"genre_norm = ${param_count}")
+    
+    if instrument:
+        param_count += 1
+        conditions.append(f"instrument_norm = ${param_count}")
+    
+    candidate_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+    
+    return f"""
+        WITH candidates AS (
+            SELECT id
+            FROM plugin_chains
+            {candidate_clause}
+            ORDER BY binary_quantize(embedding)::bit(1536) <~> binary_quantize($1::halfvec(1536))
+            LIMIT {RERANK_CANDIDATES}
+        )
+        SELECT c.id, c.name, c.description, c.plugins, c.genre, c.instrument,
+               c.tags, c.rating, c.created_at, c.created_by,
+               1 - (c.embedding <=> $1::halfvec(1536)) as similarity
+        FROM plugin_chains c
+        JOIN candidates USING (id)
+        ORDER BY c.embedding <=> $1::halfvec(1536)
+        LIMIT $2 OFFSET $3
+    """
+
+
+class HNSWParams(NamedTuple):
+    """HNSW index build and search parameters"""
+    m: int
+    ef_construction: int
+    ef_search: int
+
+
+def configure_hnsw_params(row_count: int) -> HNSWParams:
+    """Pick HNSW parameters suited to the number of indexed vectors"""
+    if row_count < 10_000:
+        return HNSWParams(m=16, ef_construction=64, ef_search=40)
+    if row_count < 1_000_000:
+        return HNSWParams(m=24, ef_construction=128, ef_search=100)
+    return HNSWParams(m=32, ef_construction=128, ef_search=200)
 
 
 class SupabaseVectorStore:
@@ -14,68 +142,392 @@ class SupabaseVectorStore:
     
     def __init__(self):
         self.db = db
-        self.embedding_service = embedding_service
+        
+        # Plugin chains queued by concurrent add_plugin_chain calls
+        self._pending_chains: List[Tuple[PluginChain, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Table initialization runs once per process
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        
+        # Whether pooled sessions run iterative HNSW scans; detected with the schema
+        self._iterative_scan = False
+        
+        # Search results keyed on query text/embedding; cleared on every insert
+        # here and expired after a minute for writes made elsewhere
+        self.search_cache = SemanticCache(threshold=0.97, max_entries=1024, ttl=60.0)
+    
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        """Shared embedding service, created on first use"""
+        return get_embedding_service()
     
     async def initialize_tables(self):
         """Check if tables exist and create plugin-related ones if needed"""
+        if self._initialized:
+            return
+        
+        async with self._init_lock:
+            if self._initialized:
+                return
+            await self._create_tables()
+            self._initialized = True
+    
+    @asynccontextmanager
+    async def _schema_lock(self, conn: asyncpg.Connection):
+        """
+        Hold the advisory lock serializing schema changes across workers
+        
+        Waiters poll rather than block: a blocked statement holds a snapshot
+        that CREATE INDEX CONCURRENTLY would wait on.
+        """
+        while not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", SCHEMA_LOCK):
+            await asyncio.sleep(1)
+        try:
+            yield
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", SCHEMA_LOCK)
+    
+    async def _create_tables(self):
+        """
+        Create plugin tables and configure sessions for the existing indices
+        
+        Vector indices are not built here, as a build over a large table would
+        stall startup; run build_indexes (python demo.py --build-indexes) after
+        deploying or bulk loading.
+        """
         async with self.db.get_connection() as conn:
-            # Check if documents table exists
-            exists = await conn.fetchval("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'documents'
-                );
-            """)
+            # Every worker runs this at startup; serialize them so only the
+            # first changes anything and the rest find the schema up to date
+            async with self._schema_lock(conn):
+                await self._create_schema(conn)
             
-            if not exists:
-                raise Exception("Documents table not found in Supabase database")
+            document_count = await self._estimate_row_count(conn, "documents")
+            vector_version = await conn.fetchval(
+                "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+            )
+        
+        await self._configure_sessions(configure_hnsw_params(document_count), vector_version)
+    
+    async def build_indexes(self):
+        """
+        Create or rebuild the vector and content hash indices
+        
+        HNSW indices are rebuilt when the row count has moved them to another
+        parameter tier. Builds run CONCURRENTLY, so searches and writes keep
+        going meanwhile, but can take a long time on a large table; run this
+        as a maintenance step rather than at startup.
+        """
+        await self.initialize_tables()
+        async with self.db.get_connection() as conn:
+            async with self._schema_lock(conn):
+                document_params = await self._build_indexes(conn)
             
-            # Create plugin chains table if it doesn't exist
+            vector_version = await conn.fetchval(
+                "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+            )
+        
+        await self._configure_sessions(document_params, vector_version)
+    
+    async def _configure_sessions(self, document_params: HNSWParams, vector_version: Optional[str]):
+        """Apply search settings for the documents index and the pgvector release to pooled sessions"""
+        # The session ef_search is sized to the documents index. Plugin chain
+        # searches need up to RERANK_CANDIDATES candidates from a filtered scan:
+        # an iterative scan keeps going until it has them, older pgvector
+        # releases get a larger ef_search per query instead
+        settings = {"hnsw.ef_search": str(document_params.ef_search)}
+        self._iterative_scan = self._parse_version(vector_version) >= ITERATIVE_SCAN_VERSION
+        if self._iterative_scan:
+            settings["hnsw.iterative_scan"] = "relaxed_order"
+            settings["hnsw.max_scan_tuples"] = str(MAX_SCAN_TUPLES)
+        await self.db.configure_session(settings)
+    
+    @staticmethod
+    def _parse_version(version: Optional[str]) -> Tuple[int, ...]:
+        """Parse an extension version such as '0.8.0' into a comparable tuple"""
+        parts = []
+        for part in (version or "").split("."):
+            if not part.isdigit():
+                break
+            parts.append(int(part))
+        return tuple(parts)
+    
+    async def _create_schema(self, conn: asyncpg.Connection):
+        """Create or update the plugin tables and their column indices"""
+        # Check if documents table exists
+        exists = await conn.fetchval("""
+            SELECT EXISTS (
+                SELECT FROM information_schema.tables 
+                WHERE table_schema = 'public' 
+                AND table_name = 'documents'
+            );
+        """)
+        
+        if not exists:
+            raise Exception("Documents table not found in Supabase database")
+        
+        # Create plugin chains table if it doesn't exist
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS plugin_chains (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                description TEXT,
+                plugins JSONB,
+                genre VARCHAR(100),
+                instrument VARCHAR(100),
+                tags TEXT[],
+                rating FLOAT,
+                created_at TIMESTAMP DEFAULT NOW(),
+                created_by VARCHAR(100),
+                embedding halfvec(1536)
+            );
+        """)
+        
+        # Migrate plugin chain embeddings stored as FP32 vectors to FP16
+        embedding_type = await conn.fetchval("""
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = 'plugin_chains'::regclass AND attname = 'embedding'
+        """)
+        if embedding_type == "vector(1536)":
+            await conn.execute("DROP INDEX IF EXISTS plugin_chains_embedding_idx")
             await conn.execute("""
-                CREATE TABLE IF NOT EXISTS plugin_chains (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    plugins JSONB,
-                    genre VARCHAR(100),
-                    instrument VARCHAR(100),
-                    tags TEXT[],
-                    rating FLOAT,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    created_by VARCHAR(100),
-                    embedding vector(1536)
-                );
+                ALTER TABLE plugin_chains
+                ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536);
             """)
-            
-            # Create indices for vector similarity search if they don't exist
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS plugin_chains_embedding_idx 
-                ON plugin_chains USING hnsw (embedding vector_cosine_ops);
+        
+        # Content hashes make re-ingesting unchanged content a no-op
+        await conn.execute("ALTER TABLE plugin_chains ADD COLUMN IF NOT EXISTS content_hash BYTEA")
+        await conn.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS plugin_chains_content_hash_idx
+            ON plugin_chains (content_hash)
+        """)
+        await self._backfill_chain_hashes(conn)
+        
+        # Lowercased filter columns so filters are index-friendly equality matches
+        await conn.execute("""
+            ALTER TABLE plugin_chains
+            ADD COLUMN IF NOT EXISTS genre_norm TEXT GENERATED ALWAYS AS (lower(genre)) STORED,
+            ADD COLUMN IF NOT EXISTS instrument_norm TEXT GENERATED ALWAYS AS (lower(instrument)) STORED;
+        """)
+        await conn.execute("CREATE INDEX IF NOT EXISTS plugin_chains_genre_norm_idx ON plugin_chains (genre_norm)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS plugin_chains_instrument_norm_idx ON plugin_chains (instrument_norm)")
+    
+    async def _build_indexes(self, conn: asyncpg.Connection) -> HNSWParams:
+        """
+        Create or rebuild the vector indices and the documents content hash index
+        
+        Returns:
+            HNSW parameters of the documents index
+        """
+        # The shared documents table gets no new column, only an expression
+        # index; it may already hold duplicates, so the index is not unique
+        await self._create_index_concurrently(
+            conn, "documents_content_sha256_idx", f"documents ({DOCUMENT_HASH})"
+        )
+        
+        # Create indices for vector similarity search, sized to the corpus
+        chain_count = await self._estimate_row_count(conn, "plugin_chains")
+        await self._ensure_hnsw_index(
+            conn, "plugin_chains_embedding_idx", "plugin_chains",
+            "embedding halfvec_cosine_ops", chain_count
+        )
+        await self._ensure_hnsw_index(
+            conn, "plugin_chains_embedding_bits_idx", "plugin_chains",
+            "(binary_quantize(embedding)::bit(1536)) bit_hamming_ops", chain_count
+        )
+        
+        # Partial indices keep genre-filtered searches on an HNSW scan
+        top_genres = await conn.fetch(f"""
+            SELECT genre_norm AS genre, count(*) AS chain_count
+            FROM plugin_chains
+            WHERE genre_norm IS NOT NULL
+            GROUP BY 1
+            ORDER BY 2 DESC
+            LIMIT {PARTIAL_INDEX_GENRES}
+        """)
+        genre_indexes = {
+            f"{GENRE_INDEX_PREFIX}{hashlib.sha1(row['genre'].encode()).hexdigest()[:12]}_idx": row
+            for row in top_genres
+        }
+        
+        # Drop partial indices for genres that fell out of the top list or
+        # were built on the old lower(genre) predicate
+        existing_genre_indexes = await conn.fetch("""
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE tablename = 'plugin_chains' AND starts_with(indexname, $1)
+        """, GENRE_INDEX_PREFIX)
+        for row in existing_genre_indexes:
+            if row['indexname'] not in genre_indexes or "genre_norm" not in row['indexdef']:
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {row['indexname']}")
+        
+        for index_name, row in genre_indexes.items():
+            genre_literal = row['genre'].replace("'", "''")
+            await self._ensure_hnsw_index(
+                conn, index_name, "plugin_chains",
+                "(binary_quantize(embedding)::bit(1536)) bit_hamming_ops", row['chain_count'],
+                where=f"genre_norm = '{genre_literal}'"
+            )
+        
+        # The shared documents table keeps its column type and its existing
+        # vector index for other readers; searches here use a halfvec cast index
+        document_count = await self._estimate_row_count(conn, "documents")
+        document_params = await self._ensure_hnsw_index(
+            conn, "documents_embedding_halfvec_idx", "documents",
+            "(embedding::halfvec(1536)) halfvec_cosine_ops", document_count
+        )
+        
+        return document_params
+    
+    async def _create_index_concurrently(self, conn: asyncpg.Connection, index_name: str, definition: str):
+        """Create an index without blocking writes, replacing an invalid one left by a failed build"""
+        valid = await conn.fetchval(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)", index_name
+        )
+        if valid:
+            return
+        if valid is not None:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+        await conn.execute(f"CREATE INDEX CONCURRENTLY {index_name} ON {definition}")
+    
+    async def _backfill_chain_hashes(self, conn: asyncpg.Connection):
+        """Hash chains stored before content_hash existed, so re-ingesting them is a no-op"""
+        rows = await conn.fetch("""
+            SELECT id, name, description, plugins, genre, instrument, tags
+            FROM plugin_chains
+            WHERE content_hash IS NULL
+            ORDER BY id
+        """)
+        if not rows:
+            return
+        
+        hashes = [
+            self._chain_hash(PluginChain.model_construct(
+                name=row['name'],
+                description=row['description'],
+                plugins=[Plugin.model_construct(**plugin) for plugin in row['plugins'] or []],
+                genre=row['genre'],
+                instrument=row['instrument'],
+                tags=row['tags'] or []
+            ))
+            for row in rows
+        ]
+        
+        # Duplicates of an already hashed chain keep a NULL hash, as the index is unique
+        taken = set(await self._existing_hashes("plugin_chains", "content_hash", hashes))
+        updates = []
+        for row, content_hash in zip(rows, hashes):
+            if content_hash not in taken:
+                taken.add(content_hash)
+                updates.append((content_hash, row['id']))
+        
+        await conn.executemany("UPDATE plugin_chains SET content_hash = $1 WHERE id = $2", updates)
+    
+    async def _estimate_row_count(self, conn: asyncpg.Connection, table: str) -> int:
+        """Planner row estimate for a table, avoiding a full count(*) scan"""
+        return await conn.fetchval(
+            "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = $1::regclass",
+            table
+        )
+    
+    async def _ensure_hnsw_index(
+        self,
+        conn: asyncpg.Connection,
+        index_name: str,
+        table: str,
+        column: str,
+        row_count: int,
+        where: Optional[str] = None
+    ) -> HNSWParams:
+        """
+        Create an HNSW index, rebuilding it when its build parameters are out of date
+        
+        The index is built CONCURRENTLY under a temporary name and swapped in,
+        so writes are not blocked and searches keep the old index meanwhile.
+        """
+        params = configure_hnsw_params(row_count)
+        options = [f"m={params.m}", f"ef_construction={params.ef_construction}"]
+        
+        current = await conn.fetchval(
+            "SELECT reloptions FROM pg_class WHERE relname = $1", index_name
+        )
+        if current is not None and sorted(current) == sorted(options):
+            return params
+        
+        where_clause = f"WHERE {where}" if where else ""
+        build_name = f"{index_name}_build"
+        
+        # An interrupted concurrent build leaves an invalid index behind
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {build_name}")
+        await conn.execute("""
+            SET maintenance_work_mem = '2GB';
+            SET max_parallel_maintenance_workers = 7;
+        """)
+        try:
+            await conn.execute(f"""
+                CREATE INDEX CONCURRENTLY {build_name}
+                ON {table} USING hnsw ({column})
+                WITH (m = {params.m}, ef_construction = {params.ef_construction})
+                {where_clause};
             """)
-            
+        finally:
             await conn.execute("""
-                CREATE INDEX IF NOT EXISTS documents_embedding_idx 
-                ON documents USING hnsw (embedding vector_cosine_ops);
+                RESET maintenance_work_mem;
+                RESET max_parallel_maintenance_workers;
             """)
+        
+        async with conn.transaction():
+            await conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+            await conn.execute(f"ALTER INDEX {build_name} RENAME TO {index_name}")
+        
+        return params
     
-    async def search_documents(self, query_text: str, limit: int = 5) -> List[Tuple[DocumentChunk, float]]:
-        """Search for document chunks by similarity using existing documents table"""
-        query_embedding = await self.embedding_service.generate_embedding(query_text)
+    @asynccontextmanager
+    async def _connection_with_embedding(self, query_text: str, query_embedding: Optional[np.ndarray]):
+        """
+        Check out a pooled connection while the query embedding is generated
         
-        query = """
-            SELECT d.id, d.content, d.metadata, d.embedding, 
-                   dm.title, dm.url, 
-                   1 - (d.embedding <=> $1) as similarity
-            FROM documents d
-            LEFT JOIN document_metadata dm ON d.metadata->>'source' = dm.id
-            WHERE d.embedding IS NOT NULL
-            ORDER BY d.embedding <=> $1
-            LIMIT $2
+        Yields (connection, query_embedding). The embedding request and the
+        pool checkout are independent round-trips, so they run concurrently.
         """
+        embedding_task = None
+        if query_embedding is None:
+            embedding_task = asyncio.ensure_future(embed_query(query_text))
         
-        async with self.db.get_connection() as conn:
-            rows = await conn.fetch(query, query_embedding, limit)
+        try:
+            async with self.db.get_connection() as conn:
+                if embedding_task is not None:
+                    query_embedding = await embedding_task
+                yield conn, query_embedding
+        finally:
+            if embedding_task is not None and not embedding_task.done():
+                embedding_task.cancel()
+    
+    async def search_documents(
+        self,
+        query_text: str,
+        limit: int = 5,
+        query_embedding: Optional[np.ndarray] = None,
+        include_embedding: bool = False
+    ) -> List[Tuple[DocumentChunk, float]]:
+        """
+        Search for document chunks by similarity using existing documents table
+        
+        Stored embeddings are only fetched when include_embedding is set;
+        otherwise DocumentChunk.embedding is left empty.
+        """
+        scope = ("documents", limit, include_embedding)
+        cached = self.search_cache.get_exact(query_text, scope)
+        if cached is not None:
+            return cached
+        
+        async with self._connection_with_embedding(query_text, query_embedding) as (conn, query_embedding):
+            cached = self.search_cache.get(query_embedding, scope)
+            if cached is not None:
+                return cached
+            
+            rows = await conn.fetch(_document_search_sql(include_embedding), query_embedding, limit)
             
             results = []
             for row in rows:
@@ -86,7 +538,7 @@ class SupabaseVectorStore:
                 chunk = DocumentChunk(
                     id=row['id'],
                     content=row['content'],
-                    embedding=list(row['embedding']) if row['embedding'] else [],
+                    embedding=list(row['embedding']) if include_embedding and row['embedding'] is not None else [],
                     metadata=metadata,
                     source=source,
                     chunk_index=metadata.get('chunk_index', 0),
@@ -94,84 +546,268 @@ class SupabaseVectorStore:
                 )
                 similarity = float(row['similarity'])
                 results.append((chunk, similarity))
-            
-            return results
+        
+        self.search_cache.put(query_embedding, results, text=query_text, scope=scope)
+        return results
     
-    async def add_plugin_chain(self, chain: PluginChain) -> int:
-        """Add a plugin chain to the vector store"""
-        # Generate embedding from chain description and metadata
+    @staticmethod
+    def _chain_text(chain: PluginChain) -> str:
+        """Build the text embedded for a plugin chain from its description and metadata"""
         chain_text = f"{chain.name} {chain.description} {' '.join(chain.tags)}"
         if chain.genre:
             chain_text += f" {chain.genre}"
         if chain.instrument:
             chain_text += f" {chain.instrument}"
+        return chain_text
+    
+    @classmethod
+    def _chain_hash(cls, chain: PluginChain) -> bytes:
+        """Content hash of a chain's embedded text and its plugins"""
+        plugins = json.dumps([plugin.dict() for plugin in chain.plugins], sort_keys=True)
+        return _content_hash(f"{cls._chain_text(chain)}\n{plugins}")
+    
+    @staticmethod
+    def _chain_record(chain: PluginChain, embedding: np.ndarray, content_hash: bytes) -> tuple:
+        """Build the plugin_chains row for a chain, ordered as CHAIN_COLUMNS"""
+        return (
+            chain.name,
+            chain.description,
+            [plugin.dict() for plugin in chain.plugins],
+            chain.genre,
+            chain.instrument,
+            chain.tags,
+            chain.rating,
+            chain.created_by,
+            embedding,
+            content_hash
+        )
+    
+    async def add_plugin_chain(self, chain: PluginChain) -> int:
+        """
+        Add a plugin chain to the vector store
+        
+        Concurrent calls (e.g. under asyncio.gather) are coalesced into a
+        single add_plugin_chains batch.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending_chains.append((chain, future))
         
-        embedding = await self.embedding_service.generate_embedding(chain_text)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_pending_chains())
+        
+        return await future
+    
+    async def _flush_pending_chains(self):
+        """Insert every queued plugin chain as one batch"""
+        # Let the other calls scheduled alongside this one join the batch
+        await asyncio.sleep(0)
+        
+        pending, self._pending_chains = self._pending_chains, []
+        self._flush_task = None
+        
+        try:
+            chain_ids = await self.add_plugin_chains([chain for chain, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), chain_id in zip(pending, chain_ids):
+                if not future.done():
+                    future.set_result(chain_id)
+    
+    async def _existing_hashes(self, table: str, hash_expression: str, hashes: List[bytes]) -> Dict[bytes, int]:
+        """Map the content hashes already stored in a table to their (lowest) row IDs"""
+        rows = await self.db.execute_query(f"""
+            SELECT {hash_expression} AS content_hash, min(id) AS id
+            FROM {table}
+            WHERE {hash_expression} = ANY($1::bytea[])
+            GROUP BY 1
+        """, list(set(hashes)))
+        return {bytes(row['content_hash']): row['id'] for row in rows}
+    
+    async def add_plugin_chains(self, chains: List[PluginChain]) -> List[int]:
+        """
+        Add plugin chains using batched embedding requests and multi-row INSERTs
+        
+        Chains whose content is already stored are neither re-embedded nor
+        re-inserted; the existing row's ID is returned for them.
+        """
+        if not chains:
+            return []
+        
+        hashes = [self._chain_hash(chain) for chain in chains]
+        chain_ids_by_hash = await self._existing_hashes("plugin_chains", "content_hash", hashes)
+        
+        new_chains: Dict[bytes, PluginChain] = {}
+        for chain, content_hash in zip(chains, hashes):
+            if content_hash not in chain_ids_by_hash:
+                new_chains.setdefault(content_hash, chain)
+        
+        if new_chains:
+            chain_ids_by_hash.update(await self._insert_chains(new_chains))
+            self.search_cache.clear()
+        
+        return [chain_ids_by_hash[content_hash] for content_hash in hashes]
+    
+    async def _insert_chains(self, chains: Dict[bytes, PluginChain]) -> Dict[bytes, int]:
+        """Embed and INSERT chains keyed by content hash, returning their IDs by hash"""
+        embeddings = await embed_many_cached([self._chain_text(chain) for chain in chains.values()])
+        records = [
+            self._chain_record(chain, embedding, content_hash)
+            for (content_hash, chain), embedding in zip(chains.items(), embeddings)
+        ]
+        
+        columns = ", ".join(CHAIN_COLUMNS)
+        column_count = len(CHAIN_COLUMNS)
+        chain_ids = {}
         
         async with self.db.get_connection() as conn:
-            row = await conn.fetchrow("""
-                INSERT INTO plugin_chains 
-                (name, description, plugins, genre, instrument, tags, rating, created_by, embedding)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                RETURNING id
-            """, 
-                chain.name,
-                chain.description,
-                [plugin.dict() for plugin in chain.plugins],
-                chain.genre,
-                chain.instrument,
-                chain.tags,
-                chain.rating,
-                chain.created_by,
-                embedding
+            for start in range(0, len(records), INSERT_BATCH_ROWS):
+                batch = records[start:start + INSERT_BATCH_ROWS]
+                
+                # Build a multi-row VALUES clause: ($1..$9), ($10..$18), ...
+                values_clause = ", ".join(
+                    "(" + ", ".join(f"${row * column_count + col}" for col in range(1, column_count + 1)) + ")"
+                    for row in range(len(batch))
+                )
+                params = [value for record in batch for value in record]
+                
+                # A chain inserted concurrently since the hash lookup keeps its row
+                rows = await conn.fetch(f"""
+                    INSERT INTO plugin_chains 
+                    ({columns})
+                    VALUES {values_clause}
+                    ON CONFLICT (content_hash) DO UPDATE SET content_hash = EXCLUDED.content_hash
+                    RETURNING id, content_hash
+                """, *params)
+                chain_ids.update((bytes(row['content_hash']), row['id']) for row in rows)
+        
+        return chain_ids
+    
+    async def bulk_insert_chains(
+        self,
+        chains: List[PluginChain],
+        embeddings: Optional[List[np.ndarray]] = None
+    ) -> int:
+        """
+        Bulk load plugin chains with COPY
+        
+        Faster than INSERT for large loads but does not return the new IDs.
+        Chains whose content is already stored are skipped. Embeddings are
+        generated in one batch when not supplied.
+        
+        Returns:
+            Number of chains copied
+        """
+        if not chains:
+            return 0
+        
+        hashes = [self._chain_hash(chain) for chain in chains]
+        existing = await self._existing_hashes("plugin_chains", "content_hash", hashes)
+        
+        # Keep the first occurrence of each new hash, with its embedding if supplied
+        new_indices: Dict[bytes, int] = {}
+        for i, content_hash in enumerate(hashes):
+            if content_hash not in existing:
+                new_indices.setdefault(content_hash, i)
+        if not new_indices:
+            return 0
+        
+        new_chains = [chains[i] for i in new_indices.values()]
+        if embeddings is None:
+            new_embeddings = await embed_many_cached([self._chain_text(chain) for chain in new_chains])
+        else:
+            new_embeddings = [embeddings[i] for i in new_indices.values()]
+        
+        records = [
+            self._chain_record(chain, embedding, content_hash)
+            for chain, embedding, content_hash in zip(new_chains, new_embeddings, new_indices)
+        ]
+        
+        async with self.db.get_connection() as conn:
+            await conn.copy_records_to_table(
+                "plugin_chains",
+                records=records,
+                columns=CHAIN_COLUMNS
             )
-            return row['id']
+            # Refresh planner statistics so searches keep choosing the HNSW index
+            await conn.execute("ANALYZE plugin_chains")
+        
+        self.search_cache.clear()
+        return len(records)
     
     async def search_plugin_chains(
         self, 
         query_text: str, 
         limit: int = 5,
         genre_filter: Optional[str] = None,
-        instrument_filter: Optional[str] = None
+        instrument_filter: Optional[str] = None,
+        offset: int = 0,
+        query_embedding: Optional[np.ndarray] = None,
+        trusted: bool = True
     ) -> List[Tuple[PluginChain, float]]:
-        """Search for plugin chains by similarity"""
-        query_embedding = await self.embedding_service.generate_embedding(query_text)
+        """
+        Search for plugin chains by similarity
         
-        # Build SQL query with optional filters
-        where_conditions = []
-        params = [query_embedding, limit]
-        param_count = 2
+        Candidates are fetched by Hamming distance from the binary-quantized
+        index, then re-ranked by exact cosine distance on the halfvec embedding.
+        Genre and instrument filters are case-insensitive exact matches applied
+        during the candidate scan, which uses a genre's partial index when it
+        has one and an iterative index scan otherwise. Pass query_embedding to reuse
+        an embedding already computed for query_text. Results for identical or
+        near-identical queries with the same filters are served from cache.
         
-        if genre_filter:
-            param_count += 1
-            where_conditions.append(f"genre ILIKE ${param_count}")
-            params.append(f"%{genre_filter}%")
+        Rows are trusted by default and built with model_construct, skipping
+        validation; pass trusted=False to validate every chain and plugin.
+        """
+        scope = ("plugin_chains", limit, offset, genre_filter, instrument_filter)
+        cached = self.search_cache.get_exact(query_text, scope)
+        if cached is not None:
+            return cached
         
+        # Bind filter values in the order _plugin_chain_search_sql numbers them
+        filter_params = []
+        if genre_filter:
+            filter_params.append(genre_filter.lower())
         if instrument_filter:
-            param_count += 1
-            where_conditions.append(f"instrument ILIKE ${param_count}")
-            params.append(f"%{instrument_filter}%")
-        
-        where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+            filter_params.append(instrument_filter.lower())
         
-        query = f"""
-            SELECT *, 1 - (embedding <=> $1) as similarity
-            FROM plugin_chains
-            {where_clause}
-            ORDER BY embedding <=> $1
-            LIMIT $2
-        """
+        query = _plugin_chain_search_sql(bool(genre_filter), bool(instrument_filter))
         
-        async with self.db.get_connection() as conn:
-            rows = await conn.fetch(query, *params)
+        async with self._connection_with_embedding(query_text, query_embedding) as (conn, query_embedding):
+            cached = self.search_cache.get(query_embedding, scope)
+            if cached is not None:
+                return cached
+            
+            params = [query_embedding, limit, offset, *filter_params]
+            
+            # Without iterative scans the candidate scan returns at most
+            # ef_search rows, so raise it to the candidate count. A custom plan
+            # lets a bound genre match a partial index predicate
+            settings = []
+            if not self._iterative_scan:
+                settings.append(f"SET LOCAL hnsw.ef_search = {RERANK_CANDIDATES}")
+            if genre_filter:
+                settings.append("SET LOCAL plan_cache_mode = force_custom_plan")
+            
+            if settings:
+                async with conn.transaction():
+                    await conn.execute("; ".join(settings))
+                    rows = await conn.fetch(query, *params)
+            else:
+                rows = await conn.fetch(query, *params)
+            
+            chain_model = PluginChain.model_construct if trusted else PluginChain
+            plugin_model = Plugin.model_construct if trusted else Plugin
             
             results = []
             for row in rows:
-                chain = PluginChain(
+                chain = chain_model(
                     id=row['id'],
                     name=row['name'],
                     description=row['description'],
-                    plugins=[Plugin(**plugin) for plugin in row['plugins']],
+                    plugins=[plugin_model(**plugin) for plugin in row['plugins']],
                     genre=row['genre'],
                     instrument=row['instrument'],
                     tags=row['tags'] or [],
@@ -181,13 +817,36 @@ class SupabaseVectorStore:
                 )
                 similarity = float(row['similarity'])
                 results.append((chain, similarity))
-            
-            return results
+        
+        self.search_cache.put(query_embedding, results, text=query_text, scope=scope)
+        return results
+    
+    async def search_both(
+        self,
+        query_text: str,
+        limit: int = 5
+    ) -> Tuple[List[Tuple[PluginChain, float]], List[Tuple[DocumentChunk, float]]]:
+        """Search plugin chains and documents concurrently with a single query embedding"""
+        query_embedding = await embed_query(query_text)
+        chains, documents = await asyncio.gather(
+            self.search_plugin_chains(query_text, limit=limit, query_embedding=query_embedding),
+            self.search_documents(query_text, limit=limit, query_embedding=query_embedding)
+        )
+        return chains, documents
     
     async def add_document(self, content: str, metadata: Dict[str, Any], embedding: Optional[List[float]] = None) -> int:
-        """Add a document to the existing documents table"""
+        """
+        Add a document to the existing documents table
+        
+        Content that is already stored is not re-embedded or re-inserted; the
+        existing row's ID is returned instead.
+        """
+        existing = await self._existing_hashes("documents", DOCUMENT_HASH, [_content_hash(content)])
+        if existing:
+            return next(iter(existing.values()))
+        
         if embedding is None:
-            embedding = await self.embedding_service.generate_embedding(content)
+            embedding = await embed_cached(content)
         
         async with self.db.get_connection() as conn:
             row = await conn.fetchrow("""
@@ -195,7 +854,69 @@ class SupabaseVectorStore:
                 VALUES ($1, $2, $3)
                 RETURNING id
             """, content, metadata, embedding)
-            return row['id']
+        
+        self.search_cache.clear()
+        return row['id']
+    
+    @staticmethod
+    def _document_metadata(chunk: DocumentChunk) -> Dict[str, Any]:
+        """Fold a chunk's source and position into the documents metadata column"""
+        return {**chunk.metadata, "source": chunk.source, "chunk_index": chunk.chunk_index}
+    
+    async def add_document_chunk(self, chunk: DocumentChunk) -> int:
+        """Add a document chunk to the existing documents table"""
+        return await self.add_document(
+            chunk.content,
+            self._document_metadata(chunk),
+            embedding=chunk.embedding or None
+        )
+    
+    async def add_document_chunks_bulk(self, chunks: List[DocumentChunk]) -> int:
+        """
+        Bulk load document chunks with batched embeddings and COPY
+        
+        Chunks whose content is already stored are skipped.
+        
+        Returns:
+            Number of chunks copied
+        """
+        if not chunks:
+            return 0
+        
+        # Keep the first chunk for each content not stored yet
+        hashes = [_content_hash(chunk.content) for chunk in chunks]
+        existing = await self._existing_hashes("documents", DOCUMENT_HASH, hashes)
+        new_chunks: Dict[bytes, DocumentChunk] = {}
+        for chunk, content_hash in zip(chunks, hashes):
+            if content_hash not in existing:
+                new_chunks.setdefault(content_hash, chunk)
+        chunks = list(new_chunks.values())
+        if not chunks:
+            return 0
+        
+        # Only embed chunks that do not carry an embedding already
+        missing = [chunk for chunk in chunks if not chunk.embedding]
+        generated = iter(await embed_many_cached([chunk.content for chunk in missing]))
+        
+        records = [
+            (
+                chunk.content,
+                self._document_metadata(chunk),
+                chunk.embedding or next(generated)
+            )
+            for chunk in chunks
+        ]
+        
+        async with self.db.get_connection() as conn:
+            await conn.copy_records_to_table(
+                "documents",
+                records=records,
+                columns=["content", "metadata", "embedding"]
+            )
+            await conn.execute("ANALYZE documents")
+        
+        self.search_cache.clear()
+        return len(records)
 
 
 # Global vector store instance
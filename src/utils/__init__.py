@@ -1,14 +1,33 @@
 """
 Utils package initialization
 """
-from .config import config, Config, DatabaseConfig, EmbeddingConfig
-from .embeddings import embedding_service, EmbeddingService
+from .config import get_config, Config, DatabaseConfig, EmbeddingConfig
+from .embeddings import get_embedding_service, EmbeddingService
+from .http_client import http_client
+from .embedding_cache import embed_cached, embed_many_cached, embed_query
+from .semantic_cache import SemanticCache
 
 __all__ = [
     "config",
+    "get_config",
     "Config", 
     "DatabaseConfig",
     "EmbeddingConfig",
     "embedding_service",
-    "EmbeddingService"
+    "get_embedding_service",
+    "EmbeddingService",
+    "http_client",
+    "embed_cached",
+    "embed_many_cached",
+    "embed_query",
+    "SemanticCache"
 ]
+
+
+def __getattr__(name):
+    """Build the config and embedding service lazily on first access"""
+    if name == "config":
+        return get_config()
+    if name == "embedding_service":
+        return get_embedding_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
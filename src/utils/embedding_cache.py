@@ -0,0 +1,98 @@
+"""
+Embedding caches: on disk for ingested content, in memory for search queries
+"""
+import asyncio
+import hashlib
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+from .config import get_config
+from .embeddings import get_embedding_service
+
+
+# Number of recent query embeddings kept in memory
+QUERY_CACHE_SIZE = 1024
+
+_query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+
+def _cache_dir() -> Path:
+    """Directory holding one .npy file per cached embedding"""
+    return Path(get_config().embedding.cache_dir).expanduser()
+
+
+def _cache_path(text: str) -> Path:
+    """Path of the cached embedding for a text under the configured model"""
+    embedding_service = get_embedding_service()
+    key = f"{embedding_service.model}:{embedding_service.dimensions}:{text}"
+    return _cache_dir() / f"{hashlib.sha256(key.encode()).hexdigest()}.npy"
+
+
+def _load(text: str) -> Optional[np.ndarray]:
+    try:
+        return np.load(_cache_path(text))
+    except (OSError, ValueError):
+        return None
+
+
+def _store(text: str, embedding: np.ndarray):
+    path = _cache_path(text)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Write to a uniquely named temporary file first so readers never see a
+    # partial array and concurrent stores of the same text do not collide
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+        np.save(f, np.asarray(embedding, dtype=np.float32))
+    Path(f.name).replace(path)
+
+
+def _store_many(texts: List[str], embeddings: List[np.ndarray]):
+    for text, embedding in zip(texts, embeddings):
+        _store(text, embedding)
+
+
+async def embed_cached(text: str) -> np.ndarray:
+    """
+    Generate a float32 embedding for content being ingested, reusing the
+    on-disk copy when present
+    
+    Search queries should use embed_query instead, so arbitrary user input is
+    never written to disk.
+    """
+    embedding = await asyncio.to_thread(_load, text)
+    if embedding is None:
+        embedding = np.asarray(await get_embedding_service().generate_embedding(text), dtype=np.float32)
+        await asyncio.to_thread(_store, text, embedding)
+    return embedding
+
+
+async def embed_many_cached(texts: List[str]) -> List[np.ndarray]:
+    """Generate embeddings for texts, requesting only uncached ones in a single batch"""
+    embeddings = await asyncio.to_thread(lambda: [_load(text) for text in texts])
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        generated = await get_embedding_service().generate_embeddings_batched(missing_texts)
+        generated = [np.asarray(embedding, dtype=np.float32) for embedding in generated]
+        await asyncio.to_thread(_store_many, missing_texts, generated)
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+    
+    return embeddings
+
+
+async def embed_query(text: str) -> np.ndarray:
+    """Generate a float32 embedding for a search query, reusing recent ones from memory"""
+    embedding = _query_embeddings.get(text)
+    if embedding is not None:
+        _query_embeddings.move_to_end(text)
+        return embedding
+    
+    embedding = np.asarray(await get_embedding_service().generate_embedding(text), dtype=np.float32)
+    _query_embeddings[text] = embedding
+    if len(_query_embeddings) > QUERY_CACHE_SIZE:
+        _query_embeddings.popitem(last=False)
+    return embedding
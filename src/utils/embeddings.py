@@ -1,44 +1,75 @@
 """
 Embedding generation utilities
 """
+import asyncio
+import base64
 import numpy as np
+from functools import lru_cache
 from typing import List, Optional
+import httpx
 from openai import AsyncOpenAI
-from .config import config
+from .config import get_config
+from .http_client import http_client as shared_http_client
+from .similarity import cosine_similarity_batch
 
 
 class EmbeddingService:
     """Service for generating embeddings using OpenAI"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = AsyncOpenAI(api_key=api_key or config.openai_api_key)
-        self.model = config.embedding.model
-        self.dimensions = config.embedding.dimensions
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
+        cfg = get_config()
+        self.client = AsyncOpenAI(
+            api_key=api_key or cfg.openai_api_key,
+            http_client=http_client or shared_http_client
+        )
+        self.model = cfg.embedding.model
+        self.dimensions = cfg.embedding.dimensions
+    
+    @staticmethod
+    def _decode(embedding: str) -> np.ndarray:
+        """Decode a base64 embedding (little-endian float32) without parsing floats"""
+        return np.frombuffer(base64.b64decode(embedding), dtype="<f4")
     
-    async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for a single text"""
+    async def generate_embedding(self, text: str) -> np.ndarray:
+        """Generate embedding for a single text as a float32 array"""
         response = await self.client.embeddings.create(
             model=self.model,
             input=text,
-            encoding_format="float"
+            encoding_format="base64"
         )
-        return response.data[0].embedding
+        return self._decode(response.data[0].embedding)
     
-    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
+    async def generate_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Generate embeddings for multiple texts as float32 arrays"""
         response = await self.client.embeddings.create(
             model=self.model,
             input=texts,
-            encoding_format="float"
+            encoding_format="base64"
         )
-        return [item.embedding for item in response.data]
+        return [self._decode(item.embedding) for item in response.data]
+    
+    async def generate_embeddings_batched(self, texts: List[str], batch_size: int = 512) -> List[np.ndarray]:
+        """Generate embeddings for any number of texts with concurrent batched requests"""
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results = await asyncio.gather(*[self.generate_embeddings(batch) for batch in batches])
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
     
-    def cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        """Calculate cosine similarity between two embeddings"""
-        a_np = np.array(a)
-        b_np = np.array(b)
-        return float(np.dot(a_np, b_np) / (np.linalg.norm(a_np) * np.linalg.norm(b_np)))
+    @staticmethod
+    def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Cosine similarity between two L2-normalized float32 embeddings"""
+        return float(a @ b)
+    
+    cosine_similarity_batch = staticmethod(cosine_similarity_batch)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_service() -> EmbeddingService:
+    """Shared embedding service, created (and the config loaded) on first use"""
+    return EmbeddingService()
 
 
-# Global embedding service instance
-embedding_service = EmbeddingService()
+def __getattr__(name):
+    """Keep `embedding_service` importable; it is created on first access"""
+    if name == "embedding_service":
+        return get_embedding_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
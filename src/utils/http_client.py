@@ -0,0 +1,11 @@
+"""
+Shared HTTP client for outbound API calls
+"""
+import httpx
+
+
+# Global HTTP client so OpenAI calls reuse pooled HTTP/2 connections
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
@@ -0,0 +1,136 @@
+"""
+Semantic (embedding similarity) cache utilities
+"""
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+from .similarity import cosine_similarity_batch, normalize
+
+
+class _CacheEntry(NamedTuple):
+    embedding: np.ndarray
+    value: Any
+    scope: Hashable
+    text_key: Optional[Tuple[str, Hashable]]
+    expires_at: float
+
+
+class _ScopeMatrix(NamedTuple):
+    keys: List[int]
+    matrix: np.ndarray
+    expiry: np.ndarray
+
+
+class SemanticCache:
+    """
+    LRU cache keyed on L2-normalized embeddings and matched by cosine similarity
+
+    Entries stored with their source text can also be found by exact
+    (normalized) text, which avoids computing an embedding at all. Entries are
+    only matched within the same scope, e.g. the same search filters. Entries
+    expire ttl seconds after insertion, since the underlying data can change
+    without this process knowing (other workers, shared tables).
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024, ttl: Optional[float] = 300.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._texts: Dict[Tuple[str, Hashable], int] = {}
+        self._next_key = 0
+
+        # Stacked embeddings per scope, rebuilt lazily after inserts/evictions
+        self._matrices: Dict[Hashable, _ScopeMatrix] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Return the embedding as an L2-normalized float32 vector"""
+        return normalize(embedding)
+
+    @staticmethod
+    def _text_key(text: str, scope: Hashable) -> Tuple[str, Hashable]:
+        return text.strip().lower(), scope
+
+    def get_exact(self, text: str, scope: Hashable = None) -> Optional[Any]:
+        """Return the cached value stored for the same text, without embedding it"""
+        key = self._texts.get(self._text_key(text, scope))
+        if key is None:
+            return None
+
+        if self._entries[key].expires_at <= time.monotonic():
+            self._evict(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return self._entries[key].value
+
+    def get(self, embedding: Sequence[float], scope: Hashable = None) -> Optional[Any]:
+        """Return the cached value of the most similar entry above the threshold"""
+        if not self._entries:
+            return None
+
+        index = self._matrices.get(scope)
+        if index is None:
+            index = self._build_matrix(scope)
+            if index is None:
+                return None
+
+        scores = cosine_similarity_batch(self.normalize(embedding), index.matrix)
+        scores[index.expiry <= time.monotonic()] = -np.inf
+
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        key = index.keys[best]
+        self._entries.move_to_end(key)
+        return self._entries[key].value
+
+    def put(
+        self,
+        embedding: Sequence[float],
+        value: Any,
+        text: Optional[str] = None,
+        scope: Hashable = None
+    ):
+        """Store a value, evicting the least recently used entries when full"""
+        text_key = self._text_key(text, scope) if text is not None else None
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self._entries[self._next_key] = _CacheEntry(self.normalize(embedding), value, scope, text_key, expires_at)
+        if text_key is not None:
+            self._texts[text_key] = self._next_key
+        self._next_key += 1
+
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+
+        self._matrices.pop(scope, None)
+
+    def _evict(self, key: int):
+        entry = self._entries.pop(key)
+        if entry.text_key is not None and self._texts.get(entry.text_key) == key:
+            del self._texts[entry.text_key]
+        self._matrices.pop(entry.scope, None)
+
+    def clear(self):
+        """Drop all cached entries"""
+        self._entries.clear()
+        self._texts.clear()
+        self._matrices.clear()
+
+    def _build_matrix(self, scope: Hashable) -> Optional[_ScopeMatrix]:
+        entries = [(key, entry) for key, entry in self._entries.items() if entry.scope == scope]
+        if not entries:
+            return None
+        index = _ScopeMatrix(
+            keys=[key for key, _ in entries],
+            matrix=np.stack([entry.embedding for _, entry in entries]),
+            expiry=np.array([entry.expires_at for _, entry in entries])
+        )
+        self._matrices[scope] = index
+        return index
@@ -0,0 +1,22 @@
+"""
+Vector similarity helpers (numpy only)
+"""
+import numpy as np
+from typing import Sequence
+
+
+def normalize(embedding: Sequence[float]) -> np.ndarray:
+    """Return the embedding as an L2-normalized float32 vector"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def cosine_similarity_batch(query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of one query against a matrix of candidates
+    
+    Both inputs must already be L2-normalized float32, so this is a single
+    matrix-vector product with no per-call conversion or norms.
+    """
+    return candidates @ query
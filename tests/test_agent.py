@@ -1,10 +1,14 @@
 """
 Tests for the RAG agent
 """
+import importlib
 import pytest
 import asyncio
-from src.agent import rag_agent
-from src.database.models import PluginQuery
+import numpy as np
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from src.agent import rag_agent, RAGDependencies
+from src.database.models import PluginChain, PluginQuery
 
 
 @pytest.mark.asyncio
@@ -24,5 +28,111 @@ async def test_simple_query():
     assert hasattr(response, 'confidence')
 
 
+@pytest.mark.asyncio
+async def test_prompt_prefix_is_stable():
+    """Successive requests share a byte-identical prefix ahead of the user query"""
+    prefixes = []
+    
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        request_parts = messages[0].parts
+        assert request_parts[-1].part_kind == "user-prompt"
+        prefixes.append("".join(part.content for part in request_parts[:-1]).encode())
+        
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {
+            "recommendations": [],
+            "explanation": "test",
+            "additional_tips": None,
+            "confidence": 0.5
+        })])
+    
+    with rag_agent.agent.override(model=FunctionModel(respond)):
+        await rag_agent.agent.run("warm vintage vocal chain", deps=RAGDependencies())
+        await rag_agent.agent.run("punchy drum bus", deps=RAGDependencies())
+    
+    assert len(prefixes) == 2
+    assert prefixes[0] == prefixes[1]
+
+
+@pytest.mark.asyncio
+async def test_response_cache_is_scoped_by_filters(monkeypatch):
+    """The same query text with different filters is not served another filter's response"""
+    calls = []
+    
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        calls.append(messages)
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {
+            "recommendations": [],
+            "explanation": f"answer {len(calls)}",
+            "additional_tips": None,
+            "confidence": 0.5
+        })])
+    
+    async def fake_embedding(text):
+        return np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    
+    async def no_fast_path(query, deps):
+        return None
+    
+    agent_module = importlib.import_module("src.agent.rag_agent")
+    monkeypatch.setattr(agent_module, "embed_query", fake_embedding)
+    monkeypatch.setattr(rag_agent, "_fast_path", no_fast_path)
+    # Runs pass rag_agent.model explicitly; keep it from building an OpenAI provider
+    monkeypatch.setattr(rag_agent, "_model", "test")
+    rag_agent.response_cache.clear()
+    
+    with rag_agent.agent.override(model=FunctionModel(respond)):
+        rock, rock_hit = await rag_agent._run_agent(PluginQuery(text="vocal chain", genre="rock"), RAGDependencies())
+        jazz, jazz_hit = await rag_agent._run_agent(PluginQuery(text="vocal chain", genre="jazz"), RAGDependencies())
+        again, again_hit = await rag_agent._run_agent(PluginQuery(text="vocal chain", genre="Rock"), RAGDependencies())
+    
+    assert not rock_hit and not jazz_hit and again_hit
+    assert rock.explanation == again.explanation == "answer 1"
+    assert jazz.explanation == "answer 2"
+    rag_agent.response_cache.clear()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("similarity, uses_model", [(0.95, False), (0.5, True)])
+async def test_fast_path_skips_model_for_confident_matches(monkeypatch, similarity, uses_model):
+    """A top chain at or above FAST_PATH_THRESHOLD is answered without the model"""
+    agent_module = importlib.import_module("src.agent.rag_agent")
+    assert (similarity >= agent_module.FAST_PATH_THRESHOLD) != uses_model
+    calls = []
+    
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        calls.append(messages)
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {
+            "recommendations": [],
+            "explanation": "from the model",
+            "additional_tips": None,
+            "confidence": 0.5
+        })])
+    
+    async def fake_embedding(text):
+        return np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    
+    chain = PluginChain(name="Warm Vocal", description="Warm vintage vocal chain", plugins=[])
+    
+    async def fake_search(query_text, limit, genre_filter, instrument_filter, query_embedding):
+        return [(chain, similarity)]
+    
+    monkeypatch.setattr(agent_module, "embed_query", fake_embedding)
+    monkeypatch.setattr(agent_module.vector_store, "search_plugin_chains", fake_search)
+    monkeypatch.setattr(rag_agent, "_model", "test")
+    rag_agent.response_cache.clear()
+    
+    with rag_agent.agent.override(model=FunctionModel(respond)):
+        response, cache_hit = await rag_agent._run_agent(PluginQuery(text="warm vocal chain"), RAGDependencies())
+    
+    assert not cache_hit
+    assert len(calls) == (1 if uses_model else 0)
+    if uses_model:
+        assert response.explanation == "from the model"
+    else:
+        assert response.explanation == "Matched on: Warm Vocal — Warm vintage vocal chain"
+        assert response.confidence == similarity
+    rag_agent.response_cache.clear()
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
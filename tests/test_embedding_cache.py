@@ -0,0 +1,71 @@
+"""
+Tests for the on-disk embedding cache
+"""
+import pytest
+from src.utils import embedding_cache
+
+
+class FakeEmbeddingService:
+    """Embedding service stub that counts requested texts"""
+    
+    model = "fake-model"
+    dimensions = 3
+    
+    def __init__(self):
+        self.requested = []
+    
+    async def generate_embedding(self, text):
+        self.requested.append(text)
+        return [float(len(text)), 0.0, 1.0]
+    
+    async def generate_embeddings_batched(self, texts):
+        self.requested.extend(texts)
+        return [[float(len(text)), 0.0, 1.0] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_embed_cached_reuses_disk_copy(tmp_path, monkeypatch):
+    """A text is only sent to the embedding service once"""
+    service = FakeEmbeddingService()
+    monkeypatch.setattr(embedding_cache, "_cache_dir", lambda: tmp_path)
+    monkeypatch.setattr(embedding_cache, "get_embedding_service", lambda: service)
+    
+    first = await embedding_cache.embed_cached("warm vocal chain")
+    second = await embedding_cache.embed_cached("warm vocal chain")
+    
+    assert first.tolist() == second.tolist() == [16.0, 0.0, 1.0]
+    assert service.requested == ["warm vocal chain"]
+
+
+@pytest.mark.asyncio
+async def test_embed_many_cached_batches_only_misses(tmp_path, monkeypatch):
+    """Bulk embedding requests skip texts that are already cached"""
+    service = FakeEmbeddingService()
+    monkeypatch.setattr(embedding_cache, "_cache_dir", lambda: tmp_path)
+    monkeypatch.setattr(embedding_cache, "get_embedding_service", lambda: service)
+    
+    await embedding_cache.embed_cached("drum bus")
+    embeddings = await embedding_cache.embed_many_cached(["drum bus", "bass chain"])
+    
+    assert [embedding.tolist() for embedding in embeddings] == [[8.0, 0.0, 1.0], [10.0, 0.0, 1.0]]
+    assert service.requested == ["drum bus", "bass chain"]
+
+
+@pytest.mark.asyncio
+async def test_embed_query_stays_in_memory(tmp_path, monkeypatch):
+    """Query embeddings are reused from memory and never written to disk"""
+    service = FakeEmbeddingService()
+    monkeypatch.setattr(embedding_cache, "_cache_dir", lambda: tmp_path)
+    monkeypatch.setattr(embedding_cache, "get_embedding_service", lambda: service)
+    monkeypatch.setattr(embedding_cache, "_query_embeddings", embedding_cache.OrderedDict())
+    
+    first = await embedding_cache.embed_query("airy vocal")
+    second = await embedding_cache.embed_query("airy vocal")
+    
+    assert first.tolist() == second.tolist() == [10.0, 0.0, 1.0]
+    assert service.requested == ["airy vocal"]
+    assert list(tmp_path.iterdir()) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,60 @@
+"""
+Tests for the semantic cache
+"""
+import pytest
+from src.utils import semantic_cache
+from src.utils.semantic_cache import SemanticCache
+
+
+def test_semantic_cache_hit_on_similar_embedding():
+    """Near-identical embeddings return the cached value"""
+    cache = SemanticCache(threshold=0.95)
+    cache.put([1.0, 0.0, 0.0], "vocal chain")
+    
+    assert cache.get([0.99, 0.01, 0.0]) == "vocal chain"
+    assert cache.get([0.0, 1.0, 0.0]) is None
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    """The least recently used entry is evicted when the cache is full"""
+    cache = SemanticCache(threshold=0.95, max_entries=2)
+    cache.put([1.0, 0.0, 0.0], "a")
+    cache.put([0.0, 1.0, 0.0], "b")
+    
+    # Touch "a" so "b" becomes the eviction candidate
+    assert cache.get([1.0, 0.0, 0.0]) == "a"
+    cache.put([0.0, 0.0, 1.0], "c")
+    
+    assert len(cache) == 2
+    assert cache.get([0.0, 1.0, 0.0]) is None
+    assert cache.get([1.0, 0.0, 0.0]) == "a"
+
+
+def test_semantic_cache_exact_text_and_scope():
+    """Exact text hits skip embedding, and entries only match within their scope"""
+    cache = SemanticCache(threshold=0.95)
+    cache.put([1.0, 0.0, 0.0], ["rock chains"], text="Drum Bus ", scope=("rock",))
+    
+    assert cache.get_exact("drum bus", scope=("rock",)) == ["rock chains"]
+    assert cache.get_exact("drum bus", scope=("pop",)) is None
+    assert cache.get([1.0, 0.0, 0.0], scope=("pop",)) is None
+    assert cache.get([1.0, 0.0, 0.0], scope=("rock",)) == ["rock chains"]
+
+
+def test_semantic_cache_entries_expire(monkeypatch):
+    """Entries older than the TTL are neither matched by text nor by embedding"""
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticCache(threshold=0.95, ttl=60.0)
+    cache.put([1.0, 0.0, 0.0], "vocal chain", text="vocal chain")
+    
+    now[0] += 59.0
+    assert cache.get([1.0, 0.0, 0.0]) == "vocal chain"
+    
+    now[0] += 2.0
+    assert cache.get([1.0, 0.0, 0.0]) is None
+    assert cache.get_exact("vocal chain") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,147 @@
+"""
+Tests for vector store helpers and plugin chain insert batching
+"""
+import asyncio
+import re
+from contextlib import asynccontextmanager
+import numpy as np
+import pytest
+from src.database.models import PluginChain
+from src.database.vector_store import (
+    ITERATIVE_SCAN_VERSION, HNSWParams, SupabaseVectorStore, configure_hnsw_params,
+    _document_search_sql
+)
+
+
+def make_chain(name):
+    """Build a minimal plugin chain"""
+    return PluginChain(name=name, description=f"{name} chain", plugins=[])
+
+
+@pytest.mark.asyncio
+async def test_add_plugin_chain_coalesces_concurrent_calls(monkeypatch):
+    """Concurrent calls share one batch and each gets its own ID back"""
+    store = SupabaseVectorStore()
+    batches = []
+    
+    async def fake_add_plugin_chains(chains):
+        batches.append([chain.name for chain in chains])
+        return [100 + i for i in range(len(chains))]
+    
+    monkeypatch.setattr(store, "add_plugin_chains", fake_add_plugin_chains)
+    
+    chain_ids = await asyncio.gather(*(store.add_plugin_chain(make_chain(name)) for name in "abc"))
+    
+    assert batches == [["a", "b", "c"]]
+    assert chain_ids == [100, 101, 102]
+    
+    # A later call starts a new batch
+    assert await store.add_plugin_chain(make_chain("d")) == 100
+    assert batches == [["a", "b", "c"], ["d"]]
+
+
+@pytest.mark.asyncio
+async def test_add_plugin_chain_propagates_batch_errors(monkeypatch):
+    """Every caller in a failed batch sees the error"""
+    store = SupabaseVectorStore()
+    
+    async def failing_add_plugin_chains(chains):
+        raise RuntimeError("insert failed")
+    
+    monkeypatch.setattr(store, "add_plugin_chains", failing_add_plugin_chains)
+    
+    results = await asyncio.gather(
+        *(store.add_plugin_chain(make_chain(name)) for name in "ab"),
+        return_exceptions=True
+    )
+    
+    assert [str(result) for result in results] == ["insert failed", "insert failed"]
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_configure_hnsw_params_tiers():
+    """HNSW parameters grow with the number of indexed vectors"""
+    assert configure_hnsw_params(0) == HNSWParams(m=16, ef_construction=64, ef_search=40)
+    assert configure_hnsw_params(9_999) == HNSWParams(m=16, ef_construction=64, ef_search=40)
+    assert configure_hnsw_params(10_000) == HNSWParams(m=24, ef_construction=128, ef_search=100)
+    assert configure_hnsw_params(999_999) == HNSWParams(m=24, ef_construction=128, ef_search=100)
+    assert configure_hnsw_params(1_000_000) == HNSWParams(m=32, ef_construction=128, ef_search=200)
+
+
+def test_parse_version():
+    """Extension versions compare numerically and tolerate suffixes or absence"""
+    parse = SupabaseVectorStore._parse_version
+    
+    assert parse("0.8.0") == (0, 8, 0)
+    assert parse("0.10.1") > parse("0.8.0") >= ITERATIVE_SCAN_VERSION
+    assert parse("0.7.4") < ITERATIVE_SCAN_VERSION
+    assert parse("0.8.0-dev") == (0, 8)
+    assert parse(None) == ()
+
+
+class RecordingConnection:
+    """Connection stub that records fetched statements and their arguments"""
+    
+    def __init__(self):
+        self.fetches = []
+    
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+    
+    async def execute(self, query, *args):
+        pass
+    
+    async def fetch(self, query, *args):
+        self.fetches.append((query, args))
+        return []
+
+
+def placeholders(query):
+    """Numbers of the $n placeholders used in a statement"""
+    return {int(n) for n in re.findall(r"\$(\d+)", query)}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("genre, instrument", [
+    (None, None), ("Rock", None), (None, "Vocals"), ("Rock", "Vocals")
+])
+async def test_plugin_chain_search_binds_filters_to_their_placeholders(genre, instrument):
+    """Each filter value is bound to the placeholder its condition uses"""
+    store = SupabaseVectorStore()
+    store._iterative_scan = True
+    conn = RecordingConnection()
+    
+    @asynccontextmanager
+    async def fake_connection(query_text, query_embedding):
+        yield conn, query_embedding
+    
+    store._connection_with_embedding = fake_connection
+    embedding = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    
+    await store.search_plugin_chains(
+        "warm vocal chain", limit=5, genre_filter=genre, instrument_filter=instrument,
+        offset=2, query_embedding=embedding
+    )
+    
+    [(query, args)] = conn.fetches
+    assert placeholders(query) == set(range(1, len(args) + 1))
+    assert args[0] is embedding
+    assert "LIMIT $2 OFFSET $3" in query and args[1:3] == (5, 2)
+    
+    for column, value in (("genre_norm", genre), ("instrument_norm", instrument)):
+        match = re.search(rf"{column} = \$(\d+)", query)
+        if value is None:
+            assert match is None
+        else:
+            assert args[int(match.group(1)) - 1] == value.lower()
+
+
+@pytest.mark.parametrize("include_embedding", [False, True])
+def test_document_search_sql_placeholders(include_embedding):
+    """Document searches bind only the query embedding and the limit"""
+    query = _document_search_sql(include_embedding)
+    
+    assert placeholders(query) == {1, 2}
+    assert "LIMIT $2" in query
+    assert ("d.embedding," in query) == include_embedding